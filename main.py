@@ -1,13 +1,39 @@
 from fastapi import FastAPI, Request, BackgroundTasks
 from slack_sdk import WebClient
-import os, ast, difflib, shutil, requests, tarfile, zipfile
+from slack_sdk.errors import SlackApiError
+import os, io, re, sys, ast, json, time, hashlib, difflib, shutil, requests, tarfile, zipfile
+import logging, multiprocessing, threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from pathlib import Path
+from typing import TextIO
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from dotenv import load_dotenv
 
+try:
+    import tomllib
+except ImportError:  # Python < 3.11: pyproject.toml is skipped, the other dependency sources still apply
+    tomllib = None
+
+try:
+    from orjson import loads as json_loads  # C parser for the per-message Slack event payloads
+except ImportError:
+    json_loads = json.loads
+
 load_dotenv()
+logger = logging.getLogger(__name__)
 app = FastAPI()
 slack_client = WebClient(token=os.environ["SLACK_BOT_TOKEN"])
 
+# One keep-alive session for all PyPI traffic so TLS handshakes are reused across requests
+http_session = requests.Session()
+http_session.headers.update({"User-Agent": "integration-automation/1.0"})
+http_session.mount("https://", HTTPAdapter(
+    pool_connections=4, pool_maxsize=8,
+    max_retries=Retry(total=3, backoff_factor=0.3, status_forcelist=(502, 503, 504)),
+))
+
 # ─────────────────────────────────────────
 # CONFIG — change these
 PACKAGE_NAME = "endee"   # package to compare
@@ -15,20 +41,48 @@ VERSION_1    = "0.1.9"   # old version
 VERSION_2    = "0.1.13"    # new version
 REPORT_FILE  = "comparison_report.txt"
 DOWNLOAD_DIR = Path("downloaded_packages")
+PYPI_CACHE_DIR = DOWNLOAD_DIR / ".pypi_cache"
+PYPI_CACHE_TTL = 3600    # seconds to trust cached /pypi/<pkg>/<ver>/json metadata
+AST_CACHE_DIR = DOWNLOAD_DIR / ".ast_cache"
+AST_CACHE_VERSION = 5    # bump whenever extract_functions output changes
+PARALLEL_MIN_FILES = 32  # below this, process-pool startup costs more than it saves
 # ─────────────────────────────────────────
 
 
-def download_package(package: str, version: str) -> Path:
-    folder = DOWNLOAD_DIR / f"{package}-{version}"
-    if folder.exists():
-        shutil.rmtree(folder)
-    folder.mkdir(parents=True)
+# Reject absolute paths / links escaping the target on Pythons that support extraction filters
+TAR_FILTER = {"filter": "data"} if hasattr(tarfile, "data_filter") else {}
+EXTRACTED_MARKER = ".extracted-sha256"
+EXTRACT_VERSION  = 2    # bump whenever is_wanted_file changes, so older extractions are redone
 
-    res = requests.get(f"https://pypi.org/pypi/{package}/{version}/json")
+
+def is_wanted_file(name: str) -> bool:
+    """Only sources and dependency manifests are compared; skip docs, data and binaries."""
+    base = name.rsplit("/", 1)[-1]
+    return (base.endswith(".py") or base in ("pyproject.toml", "METADATA", "PKG-INFO", "requires.txt")
+            or (base.startswith("requirements") and base.endswith(".txt")))
+
+
+def get_release_files(package: str, version: str) -> list:
+    """PyPI's file list for one release, cached on disk for PYPI_CACHE_TTL seconds."""
+    cache = PYPI_CACHE_DIR / f"{package}-{version}.json"
+    try:
+        if time.time() - cache.stat().st_mtime < PYPI_CACHE_TTL:
+            return json.loads(cache.read_bytes())["urls"]
+    except (OSError, ValueError, KeyError):
+        pass
+    res = http_session.get(f"https://pypi.org/pypi/{package}/{version}/json")
     res.raise_for_status()
-    data = res.json()
+    try:
+        PYPI_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        cache.write_bytes(res.content)
+    except OSError:
+        pass
+    return res.json()["urls"]
 
-    urls   = data["urls"]
+
+def download_package(package: str, version: str) -> Path:
+    folder = DOWNLOAD_DIR / f"{package}-{version}"
+    urls   = get_release_files(package, version)
     sdist  = next((u for u in urls if u["packagetype"] == "sdist"), None)
     wheel  = next((u for u in urls if u["packagetype"] == "bdist_wheel"), None)
     target = sdist or wheel
@@ -36,77 +90,265 @@ def download_package(package: str, version: str) -> Path:
     if not target:
         raise Exception(f"No downloadable file found for {package}=={version}")
 
-    filename = folder / target["filename"]
-    with requests.get(target["url"], stream=True) as r:
-        with open(filename, "wb") as f:
-            shutil.copyfileobj(r.raw, f)
-
-    if filename.suffix == ".gz":
-        with tarfile.open(filename, "r:gz") as tar:
-            tar.extractall(folder)
-    elif filename.suffix == ".whl":
-        with zipfile.ZipFile(filename, "r") as z:
-            z.extractall(folder)
+    # PyPI files are immutable, so a folder already extracted from this exact artifact is reused
+    marker = folder / EXTRACTED_MARKER
+    sha256 = target.get("digests", {}).get("sha256")
+    stamp  = f"{sha256}:{EXTRACT_VERSION}"
+    if sha256 and marker.exists() and marker.read_text() == stamp:
+        return folder
+    if folder.exists():
+        shutil.rmtree(folder)
+    folder.mkdir(parents=True)
 
+    # Extract straight from the response stream; the archive itself is never written to disk
+    with http_session.get(target["url"], stream=True) as r:
+        r.raise_for_status()
+        r.raw.decode_content = True
+        if target["filename"].endswith(".whl"):
+            # Zip needs random access to its central directory, so wheels are buffered in memory
+            with zipfile.ZipFile(io.BytesIO(r.content)) as z:
+                z.extractall(folder, members=[n for n in z.namelist() if is_wanted_file(n)])
+        elif target["filename"].endswith(".gz"):
+            with tarfile.open(fileobj=r.raw, mode="r|gz") as tar:
+                for member in tar:
+                    if member.isfile() and is_wanted_file(member.name):
+                        tar.extract(member, folder, **TAR_FILTER)
+
+    # Written last, so an interrupted extraction is never mistaken for a complete one
+    if sha256:
+        marker.write_text(stamp)
     return folder
 
 
+def _read_bytes(path: str) -> bytes:
+    with open(path, "rb") as f:
+        return f.read()
+
+
 def get_python_files(folder: Path) -> dict:
+    # os.walk gets each directory listing from one scandir and never builds per-entry Path objects
+    root  = str(folder)
+    paths = [os.path.join(d, n) for d, _, names in os.walk(root) for n in names if n.endswith(".py")]
+    # Reads release the GIL, so a thread pool overlaps the per-file open/read syscalls
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        contents = list(pool.map(_read_bytes, paths))
     result = {}
-    for f in folder.rglob("*.py"):
-        rel = f.relative_to(folder)
+    for path, data in zip(paths, contents):
         # Strip the first component (e.g. "endee-0.1.13/") so paths match across versions
-        normalized = Path(*rel.parts[1:]) if len(rel.parts) > 1 else rel
-        result[str(normalized)] = f.read_text(errors="ignore")
+        normalized = path[len(root) + 1:].split(os.sep, 1)[-1]
+        result[normalized] = data.decode("utf-8", errors="ignore")
     return result
 
 
-def compare_code_diff(files_v1: dict, files_v2: dict) -> str:
-    lines = ["=" * 50, "📄 LINE BY LINE CODE DIFF", "=" * 50]
-    for filename in sorted(set(files_v1) | set(files_v2)):
-        v1 = files_v1.get(filename, "").splitlines()
-        v2 = files_v2.get(filename, "").splitlines()
-        if v1 == v2:
-            continue
-        file_lines = [f"\n📄 {filename}"]
-        for group in difflib.SequenceMatcher(None, v1, v2).get_grouped_opcodes(3):
-            for tag, i1, i2, j1, j2 in group:
-                if tag == "equal":
-                    for line in v1[i1:i2]:
-                        file_lines.append(f"     {line}")
-                elif tag in ("replace", "delete"):
-                    for line in v1[i1:i2]:
-                        file_lines.append(f"➖  {line}")
-                if tag in ("replace", "insert"):
-                    for line in v2[j1:j2]:
-                        file_lines.append(f"➕  {line}")
-        lines.extend(file_lines)
-    if len(lines) == 3:
-        lines.append("No code differences found.")
-    return "\n".join(lines)
-
-
-def extract_functions(source: str) -> dict:
+_process_pool = None
+_process_pool_lock = threading.Lock()
+
+
+def _get_process_pool() -> ProcessPoolExecutor:
+    """One pool for the app's lifetime, so workers (and their _functions_memo) survive across runs."""
+    global _process_pool
+    with _process_pool_lock:
+        if _process_pool is None:
+            # Never fork: this runs from a background-task thread while the event loop and Slack posts are live
+            _process_pool = ProcessPoolExecutor(max_workers=os.cpu_count(),
+                                                mp_context=multiprocessing.get_context("spawn"))
+        return _process_pool
+
+
+def _map_files(fn, items: list) -> list:
+    """Run fn over per-file work items, fanning out to a process pool for larger packages."""
+    global _process_pool
+    if len(items) < PARALLEL_MIN_FILES:
+        return list(map(fn, items))
+    pool = _get_process_pool()
+    try:
+        return list(pool.map(fn, items, chunksize=8))
+    except BrokenProcessPool:
+        # A worker died (e.g. OOM-killed); drop the pool so the next run starts a fresh one
+        logger.warning("Process pool broke; finishing this run serially")
+        with _process_pool_lock:
+            if _process_pool is pool:
+                _process_pool = None
+        pool.shutdown(wait=False, cancel_futures=True)
+        return list(map(fn, items))
+
+
+def _changed_pairs(files_v1: dict, files_v2: dict, filenames: list) -> list:
+    """(filename, src_v1, src_v2) for files whose source differs; unchanged files need no diff or parse."""
+    pairs = ((f, files_v1.get(f, ""), files_v2.get(f, "")) for f in filenames)
+    return [p for p in pairs if p[1] != p[2]]
+
+
+def _trimmed_opcodes(a: list, b: list) -> list:
+    """SequenceMatcher opcodes for a vs b, matching only the span between the common prefix and suffix."""
+    limit  = min(len(a), len(b))
+    prefix = 0
+    while prefix < limit and a[prefix] == b[prefix]:
+        prefix += 1
+    suffix = 0
+    while suffix < limit - prefix and a[-1 - suffix] == b[-1 - suffix]:
+        suffix += 1
+    end_a, end_b = len(a) - suffix, len(b) - suffix
+
+    codes = [("equal", 0, prefix, 0, prefix)] if prefix else []
+    matcher = difflib.SequenceMatcher(None, a[prefix:end_a], b[prefix:end_b])
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        codes.append((tag, i1 + prefix, i2 + prefix, j1 + prefix, j2 + prefix))
+    if suffix:
+        codes.append(("equal", end_a, len(a), end_b, len(b)))
+    return codes
+
+
+def _group_opcodes(codes: list, n: int) -> list:
+    """Same hunks as SequenceMatcher.get_grouped_opcodes(n), built from precomputed opcodes."""
+    if not codes:
+        return []
+    codes = list(codes)
+    if codes[0][0] == "equal":
+        tag, i1, i2, j1, j2 = codes[0]
+        codes[0] = tag, max(i1, i2 - n), i2, max(j1, j2 - n), j2
+    if codes[-1][0] == "equal":
+        tag, i1, i2, j1, j2 = codes[-1]
+        codes[-1] = tag, i1, min(i2, i1 + n), j1, min(j2, j1 + n)
+    groups, group = [], []
+    for tag, i1, i2, j1, j2 in codes:
+        # Split into a new hunk wherever an unchanged run is longer than the context on both sides
+        if tag == "equal" and i2 - i1 > n + n:
+            group.append((tag, i1, min(i2, i1 + n), j1, min(j2, j1 + n)))
+            groups.append(group)
+            group = []
+            i1, j1 = max(i1, i2 - n), max(j1, j2 - n)
+        group.append((tag, i1, i2, j1, j2))
+    if group and not (len(group) == 1 and group[0][0] == "equal"):
+        groups.append(group)
+    return groups
+
+
+DIFF_SAME, DIFF_DEL, DIFF_ADD = "     ", "➖  ", "➕  "
+
+
+def _diff_file(item: tuple) -> str:
+    """This file's section of the diff report, or "" when only line endings differ."""
+    filename, src_v1, src_v2 = item
+    if src_v1 == src_v2:
+        return ""
+    v1 = src_v1.splitlines()
+    v2 = src_v2.splitlines()
+    if v1 == v2:
+        return ""
+    # Intern each distinct line to an int so the matcher hashes/compares ints, not strings
+    line_ids = {}
+    ids_v1   = [line_ids.setdefault(line, len(line_ids)) for line in v1]
+    ids_v2   = [line_ids.setdefault(line, len(line_ids)) for line in v2]
+    file_lines = [f"\n📄 {filename}"]
+    for group in _group_opcodes(_trimmed_opcodes(ids_v1, ids_v2), 3):
+        for tag, i1, i2, j1, j2 in group:
+            if tag == "equal":
+                file_lines.extend(DIFF_SAME + line for line in v1[i1:i2])
+            elif tag in ("replace", "delete"):
+                file_lines.extend(DIFF_DEL + line for line in v1[i1:i2])
+            if tag in ("replace", "insert"):
+                file_lines.extend(DIFF_ADD + line for line in v2[j1:j2])
+    # One string per file: a single object to pickle back from a pool worker, not one per line
+    return "\n".join(file_lines)
+
+
+def compare_code_diff(changes: list, out: TextIO):
+    out.write("\n".join(["=" * 50, "📄 LINE BY LINE CODE DIFF", "=" * 50]))
+    # Sections go straight to out; the largest part of the report is never joined into one string
+    found = False
+    for _, section, _, _ in changes:
+        if section:
+            out.write("\n" + section)
+            found = True
+    if not found:
+        out.write("\nNo code differences found.")
+
+
+STATEMENT_BLOCKS = ("body", "handlers", "orelse", "finalbody", "cases")   # in source order
+
+
+def extract_functions(source: str, filename: str = "<unknown>") -> dict:
+    """Map qualified names (e.g. "Index.query") to full signatures in one pass over the AST."""
     functions = {}
+    # Bound locally so the per-node checks below skip global/attribute lookups
+    class_def, func_defs = ast.ClassDef, (ast.FunctionDef, ast.AsyncFunctionDef)
     try:
-        tree = ast.parse(source)
-        for node in ast.walk(tree):
-            if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
-                args = [a.arg for a in node.args.args]
-                functions[node.name] = f"def {node.name}({', '.join(args)})"
+        # compile() directly skips ast.parse's wrapper frame and tags SyntaxErrors with the real filename
+        stack = [(compile(source, filename, "exec", ast.PyCF_ONLY_AST), "")]
+        while stack:
+            node, scope = stack.pop()
+            kind = type(node)
+            if kind is class_def or kind in func_defs:
+                scope = f"{scope}.{node.name}" if scope else node.name
+                if kind is not class_def:
+                    functions[scope] = f"def {scope}({ast.unparse(node.args)})"
+            # defs are statements, so only statement blocks need visiting, never expressions
+            # Pushed in reverse so the stack pops in source order and the last definition of a name wins
+            for field in reversed(STATEMENT_BLOCKS):
+                block = getattr(node, field, None)
+                if type(block) is list:
+                    for child in reversed(block):
+                        stack.append((child, scope))
+    except Exception as e:
+        logger.debug("Could not extract functions from %s: %s", filename, e)
+    return functions
+
+
+_functions_memo = {}   # sha256 -> signatures: in-process tier in front of AST_CACHE_DIR
+_functions_memo_lock = threading.Lock()   # background tasks run on a threadpool and share the memo
+FUNCTIONS_MEMO_SIZE = 4096
+
+
+def cached_extract_functions(source: str, filename: str = "<unknown>") -> dict:
+    """extract_functions backed by an in-process memo and an on-disk cache keyed on source hash."""
+    digest    = hashlib.sha256(source.encode(errors="ignore")).hexdigest()
+    functions = _functions_memo.get(digest)
+    if functions is not None:
+        return functions
+    path = AST_CACHE_DIR / f"{digest}-py{sys.version_info[0]}{sys.version_info[1]}-v{AST_CACHE_VERSION}.json"
+    try:
+        # JSON, not pickle: entries are plain str -> str maps and the cache directory is writable data
+        functions = json_loads(path.read_bytes())
+        if type(functions) is not dict:
+            raise ValueError(path)
     except Exception:
-        pass
+        functions = extract_functions(source, filename)
+        try:
+            AST_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+            # Write-then-rename so concurrent pool workers never read a partial entry
+            tmp = path.with_suffix(f".{os.getpid()}.tmp")
+            tmp.write_text(json.dumps(functions))
+            os.replace(tmp, path)
+        except OSError:
+            pass
+    with _functions_memo_lock:
+        if len(_functions_memo) >= FUNCTIONS_MEMO_SIZE:
+            _functions_memo.pop(next(iter(_functions_memo)), None)
+        _functions_memo[digest] = functions
     return functions
 
 
-def compare_function_signatures(files_v1: dict, files_v2: dict, v1: str = "", v2: str = "") -> str:
+def _compare_file(item: tuple) -> tuple:
+    filename, src_v1, src_v2 = item
+    return (filename, _diff_file(item),
+            cached_extract_functions(src_v1, filename), cached_extract_functions(src_v2, filename))
+
+
+def compare_files(files_v1: dict, files_v2: dict, filenames: list) -> list:
+    """(filename, diff_section, functions_v1, functions_v2) per changed file, from a single pass.
+
+    Both reports come out of the same worker call, so each source is shipped to the pool once.
+    """
+    return _map_files(_compare_file, _changed_pairs(files_v1, files_v2, filenames))
+
+
+def compare_function_signatures(changes: list, out: TextIO, v1: str = "", v2: str = ""):
     v1_label = f"v{v1}" if v1 else "v1"
     v2_label = f"v{v2}" if v2 else "v2"
     lines = ["\n" + "=" * 50, "🔍 CHANGED FUNCTION SIGNATURES", "=" * 50]
     lines.append(f"(NEW = added in {v2_label} | REMOVED = absent in {v2_label} compared to {v1_label})")
-    for filename in sorted(set(files_v1) | set(files_v2)):
-        f1 = extract_functions(files_v1.get(filename, ""))
-        f2 = extract_functions(files_v2.get(filename, ""))
+    for filename, _, f1, f2 in changes:
         new     = set(f2) - set(f1)   # in v2 but not v1
         removed = set(f1) - set(f2)   # in v1 but not v2
         changed = {f for f in set(f1) & set(f2) if f1[f] != f2[f]}
@@ -120,16 +362,67 @@ def compare_function_signatures(files_v1: dict, files_v2: dict, v1: str = "", v2
                 lines.append(f"  ✏️  CHANGED:\n      {v1_label}: {f1[f]}\n      {v2_label}: {f2[f]}")
     if len(lines) == 4:
         lines.append("No function signature changes found.")
-    return "\n".join(lines)
+    out.write("\n".join(lines))
+
+
+REQUIRES_DIST = re.compile(r"^Requires-Dist:\s*(.+?)\s*$", re.M)
+EXTRA_MARKER  = re.compile(r"\bextra\s*==")
+
+
+def _requires_dist(metadata: Path) -> set:
+    """Core Requires-Dist entries of a METADATA/PKG-INFO file; extras are dropped to match requires.txt."""
+    # Headers end at the first blank line; the long description after it may quote "Requires-Dist:"
+    headers = metadata.read_text(errors="ignore").split("\n\n", 1)[0]
+    return {req for req in REQUIRES_DIST.findall(headers) if not EXTRA_MARKER.search(req)}
+
+
+def _egg_requires(requires: Path) -> set:
+    """Core entries of an egg-info requires.txt, with "[:marker]" sections written as "dep; marker"."""
+    reqs, marker = set(), ""
+    for line in requires.read_text(errors="ignore").splitlines():
+        line = line.strip()
+        if line.startswith("["):
+            # "[extra]" and "[extra:marker]" are optional extras; only "[:marker]" holds core deps
+            extra, _, marker = line[1:-1].partition(":")
+            marker = None if extra else marker
+        elif line and marker is not None:
+            reqs.add(f"{line}; {marker}" if marker else line)
+    return reqs
 
 
 def get_requirements(folder: Path) -> set:
-    for req_file in folder.rglob("requirements*.txt"):
-        return set(req_file.read_text(errors="ignore").splitlines())
+    """Declared dependencies, read from the manifests' known locations instead of walking the tree.
+
+    Order: wheel METADATA, pyproject.toml [project].dependencies, sdist egg-info requires.txt,
+    sdist PKG-INFO, and only then a root-level requirements*.txt.
+    """
+    for metadata in folder.glob("*.dist-info/METADATA"):
+        return _requires_dist(metadata)
+    if tomllib:
+        for pyproject in folder.glob("*/pyproject.toml"):
+            try:
+                deps = tomllib.loads(pyproject.read_text(errors="ignore")).get("project", {}).get("dependencies")
+            except tomllib.TOMLDecodeError:
+                deps = None
+            if deps is not None:
+                return set(deps)
+    for requires in [*folder.glob("*/*.egg-info/requires.txt"), *folder.glob("*/src/*.egg-info/requires.txt")]:
+        return _egg_requires(requires)
+    # poetry/hatch/flit sdists have no egg-info and keep their dependencies in PKG-INFO
+    for pkg_info in folder.glob("*/PKG-INFO"):
+        reqs = _requires_dist(pkg_info)
+        if reqs:
+            return reqs
+    # requirements files live at the project root: folder/ for wheels, folder/<pkg>-<ver>/ for sdists.
+    # The exact requirements.txt wins, since "-" sorts before "." and requirements-dev.txt would come first
+    req_files = [*folder.glob("requirements.txt"), *folder.glob("*/requirements.txt")]
+    for req_file in req_files or sorted([*folder.glob("requirements*.txt"), *folder.glob("*/requirements*.txt")]):
+        lines = (line.split("#", 1)[0].strip() for line in req_file.read_text(errors="ignore").splitlines())
+        return {line for line in lines if line}
     return set()
 
 
-def compare_dependencies(folder_v1: Path, folder_v2: Path, v1: str = "", v2: str = "") -> str:
+def compare_dependencies(folder_v1: Path, folder_v2: Path, out: TextIO, v1: str = "", v2: str = ""):
     v1_label = f"v{v1}" if v1 else "v1"
     v2_label = f"v{v2}" if v2 else "v2"
     lines   = ["\n" + "=" * 50, "📦 DEPENDENCIES COMPARISON", "=" * 50]
@@ -145,60 +438,79 @@ def compare_dependencies(folder_v1: Path, folder_v2: Path, v1: str = "", v2: str
         lines.extend(f"   - {r}" for r in sorted(removed))
     if not added and not removed:
         lines.append("No dependency changes found.")
-    return "\n".join(lines)
+    out.write("\n".join(lines))
 
 
 def run_comparison(channel: str, v1: str = VERSION_1, v2: str = VERSION_2):
     """Main agent — triggered when user types 'run [v1] [v2]' in Slack."""
+    # Progress posts go through one background thread: still ordered, but no longer blocking the work
+    progress = ThreadPoolExecutor(max_workers=1)
+
+    def post(text: str):
+        # Nothing waits on these futures, so failures (bad channel/token) are logged here instead
+        try:
+            slack_client.chat_postMessage(channel=channel, text=text)
+        except Exception:
+            logger.exception("Progress post to %s failed", channel)
+
+    def notify(text: str):
+        progress.submit(post, text)
+
     try:
         # Notify Slack that the task has started
-        slack_client.chat_postMessage(
-            channel=channel,
-            text=f"🤖 Agent started! Comparing *{PACKAGE_NAME}* v{v1} vs v{v2}... Please wait ⏳"
-        )
+        notify(f"🤖 Agent started! Comparing *{PACKAGE_NAME}* v{v1} vs v{v2}... Please wait ⏳")
 
         # Step 1: Download both versions
-        slack_client.chat_postMessage(channel=channel, text="⬇️ Downloading both versions from PyPI...")
-        folder_v1 = download_package(PACKAGE_NAME, v1)
-        folder_v2 = download_package(PACKAGE_NAME, v2)
+        notify("⬇️ Downloading both versions from PyPI...")
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            # dict.fromkeys: comparing a version to itself must not race on one folder
+            futures   = {v: pool.submit(download_package, PACKAGE_NAME, v) for v in dict.fromkeys((v1, v2))}
+            folder_v1 = futures[v1].result()
+            folder_v2 = futures[v2].result()
 
         # Step 2: Read all python files
         files_v1 = get_python_files(folder_v1)
         files_v2 = get_python_files(folder_v2)
 
         # Step 3: Run comparisons
-        slack_client.chat_postMessage(channel=channel, text="🔍 Comparing changes...")
-        header      = f"\nPACKAGE : {PACKAGE_NAME}\nv1      : {v1}\nv2      : {v2}\n"
-        diff_report = compare_code_diff(files_v1, files_v2)
-        func_report = compare_function_signatures(files_v1, files_v2, v1, v2)
-        deps_report = compare_dependencies(folder_v1, folder_v2, v1, v2)
-
-        # Step 4: Save report
-        full_report = header + diff_report + func_report + deps_report
-        with open(REPORT_FILE, "w") as f:
-            f.write(full_report)
-
-        # Step 5: Send full report to Slack as plain text (chunked to stay within 4000-char limit)
-        slack_client.chat_postMessage(
-            channel=channel,
-            text=(
-                f"✅ *Comparison Complete!*\n"
-                f"📦 Package: `{PACKAGE_NAME}`\n"
-                f"🔁 Versions: `{v1}` → `{v2}`\n"
-                f"📄 Full report saved to: `{REPORT_FILE}`"
-            )
+        notify("🔍 Comparing changes...")
+        filenames = sorted(files_v1.keys() | files_v2.keys())
+        changes   = compare_files(files_v1, files_v2, filenames)
+
+        # Step 4: Write the report sections straight to disk
+        with open(REPORT_FILE, "w", buffering=1 << 20) as f:
+            f.write(f"\nPACKAGE : {PACKAGE_NAME}\nv1      : {v1}\nv2      : {v2}\n")
+            compare_code_diff(changes, f)
+            compare_function_signatures(changes, f, v1, v2)
+            compare_dependencies(folder_v1, folder_v2, f, v1, v2)
+
+        # Step 5: Upload the report as one file instead of many 4000-char-limited messages,
+        # after any queued progress posts so it lands last
+        progress.shutdown(wait=True)
+        summary = (
+            f"✅ *Comparison Complete!*\n"
+            f"📦 Package: `{PACKAGE_NAME}`\n"
+            f"🔁 Versions: `{v1}` → `{v2}`\n"
+            f"📄 Full report saved to: `{REPORT_FILE}`"
         )
-
-        def send_in_chunks(text: str):
-            chunk_size = 3900
-            for i in range(0, len(text), chunk_size):
-                slack_client.chat_postMessage(channel=channel, text=text[i:i + chunk_size])
-
-        send_in_chunks(func_report)
-        send_in_chunks(deps_report)
-        send_in_chunks(diff_report)
+        try:
+            slack_client.files_upload_v2(
+                channel=channel,
+                file=REPORT_FILE,
+                title=f"{PACKAGE_NAME} {v1} → {v2} comparison report",
+                initial_comment=summary
+            )
+        except SlackApiError as e:
+            # Uploading needs the files:write scope; a chat:write-only bot still gets the summary
+            if e.response.get("error") != "missing_scope":
+                raise
+            slack_client.chat_postMessage(
+                channel=channel,
+                text=f"{summary}\n⚠️ Report not attached: add the `files:write` scope to the bot token to upload it."
+            )
 
     except Exception as e:
+        progress.shutdown(wait=True)
         slack_client.chat_postMessage(channel=channel, text=f"❌ Error: {str(e)}")
 
 
@@ -213,24 +525,26 @@ def home():
 
 @app.post("/slack/events")
 async def slack_events(request: Request, background_tasks: BackgroundTasks):
-    body = await request.json()
+    body = json_loads(await request.body())
 
     # Slack URL verification
     if body.get("type") == "url_verification":
         return {"challenge": body["challenge"]}
 
-    event  = body.get("event", {})
-    if event.get("type") == "message":
-        text   = event.get("text", "").strip().lower()
+    event = body.get("event", {})
+    # Drop non-messages and bot echoes (including our own posts) before touching the text
+    if event.get("type") != "message" or event.get("bot_id") or event.get("subtype") == "bot_message":
+        return {"status": "ok"}
+
+    # Trigger agent when user types "run <version1> <version2>"; only the prefix is lowercased
+    # until we know it is a command
+    text = event.get("text", "")
+    if text.lstrip()[:3].lower() == "run":
         channel = event.get("channel")
-        bot_id  = event.get("bot_id")
-
-        # Trigger agent when user types "run <version1> <version2>"
-        if text.startswith("run") and not bot_id:
-            parts = text.split()
-            v1 = parts[1] if len(parts) > 1 else VERSION_1
-            v2 = parts[2] if len(parts) > 2 else VERSION_2
-            print(v1,v2)
-            background_tasks.add_task(run_comparison, channel, v1, v2)
+        parts   = text.strip().lower().split()
+        v1 = parts[1] if len(parts) > 1 else VERSION_1
+        v2 = parts[2] if len(parts) > 2 else VERSION_2
+        print(v1,v2)
+        background_tasks.add_task(run_comparison, channel, v1, v2)
 
     return {"status": "ok"}
\ No newline at end of file
@@ -0,0 +1,60 @@
+import os, sys, unittest
+
+os.environ.setdefault("SLACK_BOT_TOKEN", "test")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from main import extract_functions
+
+
+class ExtractFunctionsTest(unittest.TestCase):
+    def test_overload_reports_implementation(self):
+        source = (
+            "from typing import overload\n"
+            "@overload\n"
+            "def f(x: int): ...\n"
+            "@overload\n"
+            "def f(x: str): ...\n"
+            "def f(x, strict=False):\n"
+            "    pass\n"
+        )
+        self.assertEqual(extract_functions(source), {"f": "def f(x, strict=False)"})
+
+    def test_property_setter_reports_last_definition(self):
+        source = (
+            "class A:\n"
+            "    @property\n"
+            "    def value(self):\n"
+            "        return self._value\n"
+            "    @value.setter\n"
+            "    def value(self, new, validate=True):\n"
+            "        self._value = new\n"
+        )
+        self.assertEqual(extract_functions(source), {"A.value": "def A.value(self, new, validate=True)"})
+
+    def test_else_branch_reports_last_definition(self):
+        source = (
+            "if FAST:\n"
+            "    def g(a):\n"
+            "        pass\n"
+            "else:\n"
+            "    def g(a, b):\n"
+            "        pass\n"
+        )
+        self.assertEqual(extract_functions(source), {"g": "def g(a, b)"})
+
+    def test_try_else_reports_last_definition(self):
+        source = (
+            "try:\n"
+            "    import fast\n"
+            "except ImportError:\n"
+            "    def helper(a):\n"
+            "        pass\n"
+            "else:\n"
+            "    def helper(a, b):\n"
+            "        pass\n"
+        )
+        self.assertEqual(extract_functions(source), {"helper": "def helper(a, b)"})
+
+
+if __name__ == "__main__":
+    unittest.main()
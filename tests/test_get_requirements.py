@@ -0,0 +1,75 @@
+import os, sys, tempfile, unittest
+from pathlib import Path
+
+os.environ.setdefault("SLACK_BOT_TOKEN", "test")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import main
+from main import get_requirements
+
+METADATA = (
+    "Metadata-Version: 2.1\n"
+    "Name: pkg\n"
+    "Requires-Dist: requests>=2\n"
+    'Requires-Dist: importlib-metadata; python_version < "3.8"\n'
+    'Requires-Dist: pytest; extra == "test"\n'
+    "\n"
+    "Requires-Dist: quoted-in-readme\n"
+)
+
+
+class GetRequirementsTest(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.folder = Path(self._tmp.name)
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def write(self, name: str, text: str):
+        path = self.folder / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(text)
+
+    def test_wheel_metadata_reads_headers_without_extras(self):
+        self.write("pkg-1.0.dist-info/METADATA", METADATA)
+        self.assertEqual(get_requirements(self.folder),
+                         {"requests>=2", 'importlib-metadata; python_version < "3.8"'})
+
+    @unittest.skipIf(main.tomllib is None, "tomllib needs Python 3.11+")
+    def test_pyproject_dependencies(self):
+        self.write("pkg-1.0/pyproject.toml", '[project]\nname = "pkg"\ndependencies = ["requests>=2"]\n')
+        self.write("pkg-1.0/requirements.txt", "ignored\n")
+        self.assertEqual(get_requirements(self.folder), {"requests>=2"})
+
+    def test_egg_info_matches_wheel_metadata(self):
+        self.write("pkg-1.0/pkg.egg-info/requires.txt", (
+            "requests>=2\n\n"
+            '[:python_version < "3.8"]\nimportlib-metadata\n\n'
+            "[test]\npytest\n\n"
+            '[test:sys_platform == "win32"]\npywin32\n'
+        ))
+        self.assertEqual(get_requirements(self.folder),
+                         {"requests>=2", 'importlib-metadata; python_version < "3.8"'})
+
+    def test_egg_info_with_only_extras(self):
+        self.write("pkg-1.0/pkg.egg-info/requires.txt", "[dev]\npytest\n")
+        self.assertEqual(get_requirements(self.folder), set())
+
+    def test_pkg_info(self):
+        self.write("pkg-1.0/PKG-INFO", METADATA)
+        self.assertEqual(get_requirements(self.folder),
+                         {"requests>=2", 'importlib-metadata; python_version < "3.8"'})
+
+    def test_requirements_txt_preferred_over_dev_files(self):
+        self.write("pkg-1.0/requirements-dev.txt", "pytest\n")
+        self.write("pkg-1.0/requirements.txt", "requests>=2  # http\n\n")
+        self.assertEqual(get_requirements(self.folder), {"requests>=2"})
+
+    def test_other_requirements_files_as_last_resort(self):
+        self.write("pkg-1.0/requirements-base.txt", "requests>=2\n")
+        self.assertEqual(get_requirements(self.folder), {"requests>=2"})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,46 @@
+import os, sys, random, difflib, unittest
+
+os.environ.setdefault("SLACK_BOT_TOKEN", "test")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from main import _group_opcodes, _trimmed_opcodes
+
+
+def random_pair(rng: random.Random) -> tuple:
+    a = [rng.choice("abcde") for _ in range(rng.randrange(40))]
+    b = list(a)
+    for _ in range(rng.randrange(6)):
+        i = rng.randrange(len(b) + 1)
+        if rng.random() < 0.5 and i < len(b):
+            del b[i:i + rng.randrange(1, 4)]
+        else:
+            b[i:i] = rng.choices("abcdef", k=rng.randrange(1, 4))
+    return a, b
+
+
+class OpcodesTest(unittest.TestCase):
+    def test_trimmed_opcodes_tile_both_sequences(self):
+        rng = random.Random(0)
+        for _ in range(2000):
+            a, b = random_pair(rng)
+            end_a = end_b = 0
+            for tag, i1, i2, j1, j2 in _trimmed_opcodes(a, b):
+                self.assertEqual((i1, j1), (end_a, end_b))
+                if tag == "equal":
+                    self.assertEqual(a[i1:i2], b[j1:j2])
+                end_a, end_b = i2, j2
+            self.assertEqual((end_a, end_b), (len(a), len(b)))
+
+    def test_group_opcodes_matches_difflib(self):
+        rng = random.Random(1)
+        for _ in range(2000):
+            a, b = random_pair(rng)
+            codes = _trimmed_opcodes(a, b)
+            n = rng.randrange(4)
+            matcher = difflib.SequenceMatcher(None, a, b)
+            matcher.opcodes = list(codes)   # get_grouped_opcodes groups whatever get_opcodes returns
+            self.assertEqual(_group_opcodes(codes, n), list(matcher.get_grouped_opcodes(n)))
+
+
+if __name__ == "__main__":
+    unittest.main()